@@ -8,6 +8,7 @@ import tempfile
 import threading
 import time
 import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 _EARLY_LOG_PATH = None
 
@@ -39,31 +40,132 @@ except Exception:
 
 CUSTOM_EVENT_ID = "com.justin.fusion_rpc"
 DEFAULT_PORT = 8766
+RECV_CHUNK_SIZE = 65536
+FRAME_HEADER_SIZE = 4
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+DEFAULT_POOL_SIZE = 4
+CONNECTION_TIMEOUT = 5.0
+_UNFRAMED_START_BYTES = b"{ \t\r\n"
+
+# Reused compact encoder for responses; json.dumps builds a new encoder per
+# call whenever non-default options are passed.
+_encode_json = json.JSONEncoder(separators=(",", ":")).encode
 
 _app = None
 _ui = None
 _server_thread = None
 _server_stop = threading.Event()
 _server_socket = None
+_server_pool = None
 _request_queue = queue.Queue()
+_event_pending = threading.Event()
 _handlers = []
 _log_path = None
 _log_dir = None
+_log_queue = queue.SimpleQueue()
+_log_thread = None
+_log_lock = threading.Lock()
+_log_closed = False
+_LOG_STOP = object()
 def _log(message):
-    if not _log_path:
+    if not _log_path or not _ensure_log_writer():
         _write_early_log(message)
         return
+    _log_queue.put(message + "\n")
+
+
+def _ensure_log_writer():
+    # Returns False once stop() has closed the log, so late messages from pool
+    # workers go to the early log instead of starting an unjoined writer.
+    global _log_thread
+    if _log_thread is not None and not _log_closed:
+        return True
+    with _log_lock:
+        if _log_closed:
+            return False
+        if _log_thread is None:
+            _log_thread = threading.Thread(
+                target=_log_writer, args=(_log_path,), name="fusion-rpc-log", daemon=True
+            )
+            _log_thread.start()
+        return True
+
+
+def _log_writer(path):
+    # Writes happen off the server and main threads; each wakeup drains
+    # everything queued so far and flushes once.
     try:
-        with open(_log_path, "a", encoding="utf-8") as fh:
-            fh.write(message + "\n")
+        fh = open(path, "a", encoding="utf-8")
     except Exception:
-        pass
+        fh = None
+    try:
+        while True:
+            batch = [_log_queue.get()]
+            while True:
+                try:
+                    batch.append(_log_queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = _LOG_STOP in batch
+            lines = [item for item in batch if item is not _LOG_STOP]
+            if lines:
+                try:
+                    if fh is None:
+                        raise OSError("log file not open")
+                    fh.write("".join(lines))
+                    fh.flush()
+                except Exception:
+                    _write_early_log("".join(lines).rstrip("\n"))
+            if stop:
+                return
+    finally:
+        if fh is not None:
+            try:
+                fh.close()
+            except Exception:
+                pass
+
+
+def _close_log():
+    global _log_thread, _log_closed
+    with _log_lock:
+        _log_closed = True
+        thread = _log_thread
+        _log_thread = None
+        if thread is None:
+            return
+        _log_queue.put(_LOG_STOP)
+    # Join outside the lock so pool workers logging during stop() are not
+    # held up behind it.
+    thread.join(timeout=2.0)
+    if thread.is_alive():
+        # The writer still owns the queue; draining here would race it.
+        return
+    # Anything queued after the writer's last drain goes to the early log.
+    while True:
+        try:
+            item = _log_queue.get_nowait()
+        except queue.Empty:
+            break
+        if item is not _LOG_STOP:
+            _write_early_log(item.rstrip("\n"))
+
+
+def _open_log():
+    global _log_closed
+    with _log_lock:
+        _log_closed = False
 
 
 def _format_exception():
     return traceback.format_exc()
 
 
+def _to_list(collection):
+    # Snapshot a Fusion collection so it can be walked more than once.
+    return [collection.item(idx) for idx in range(collection.count)]
+
+
 def _find_body(root_comp, body_name=None):
     for body in root_comp.bRepBodies:
         try:
@@ -79,16 +181,45 @@ def _find_body(root_comp, body_name=None):
     return None
 
 
-def _convert_mm(units_mgr, value):
+def _same_object(a, b):
+    # Fusion returns a new Python proxy for every API read, so identity alone
+    # misses the same underlying object; API objects compare equal with ==.
+    if a is b:
+        return True
+    if a is None or b is None:
+        return False
+    try:
+        return bool(a == b)
+    except Exception:
+        return False
+
+
+def _length_factor_mm(units_mgr):
     try:
-        return units_mgr.convert(value, units_mgr.internalUnits, "mm")
+        return units_mgr.convert(1.0, units_mgr.internalUnits, "mm")
     except Exception:
         # Internal units are cm; fallback conversion.
-        return value * 10.0
+        return 10.0
+
+
+def _make_convert_mm():
+    # Length conversion is linear, so each request asks the units manager for
+    # the factor once and multiplies locally afterwards.
+    cached = {"units_mgr": None, "factor": None}
+
+    def convert_mm(units_mgr, value):
+        if cached["factor"] is None or not _same_object(cached["units_mgr"], units_mgr):
+            cached["units_mgr"] = units_mgr
+            cached["factor"] = _length_factor_mm(units_mgr)
+        return value * cached["factor"]
+
+    return convert_mm
 
 
 class RpcEventHandler(adsk.core.CustomEventHandler):
     def notify(self, args):
+        # Clear before draining so a request queued after this point fires a new event.
+        _event_pending.clear()
         try:
             while True:
                 request, done_event, response_holder = _request_queue.get_nowait()
@@ -99,6 +230,11 @@ class RpcEventHandler(adsk.core.CustomEventHandler):
             return
         except Exception:
             _log("Handler error:\n" + _format_exception())
+        finally:
+            # A request that raised past the drain (e.g. SystemExit from a
+            # snippet) must not strand later requests that skipped firing.
+            if not _request_queue.empty():
+                _fire_rpc_event()
 
 
 def _get_custom_event(app, event_id):
@@ -167,6 +303,24 @@ def _unregister_custom_event(app, event_id):
             pass
 
 
+def _build_context():
+    design = adsk.fusion.Design.cast(_app.activeProduct)
+    root_comp = design.rootComponent if design else None
+    units_mgr = design.unitsManager if design else None
+
+    return {
+        "app": _app,
+        "ui": _ui,
+        "design": design,
+        "root_comp": root_comp,
+        "units_mgr": units_mgr,
+        "log": _log,
+        "find_body": _find_body,
+        "to_list": _to_list,
+        "convert_mm": _make_convert_mm(),
+    }
+
+
 def _handle_request(request):
     response = {"ok": False}
     if isinstance(request, dict) and "id" in request:
@@ -174,34 +328,21 @@ def _handle_request(request):
 
     try:
         cmd = request.get("cmd")
-        if cmd == "help":
-            response.update({"ok": True, "commands": ["run_python"]})
-            return response
-        if cmd != "run_python":
+        handler = _COMMANDS.get(cmd)
+        if handler is None:
             response.update({"ok": False, "error": f"Unknown command: {cmd}"})
             return response
-
-        design = adsk.fusion.Design.cast(_app.activeProduct)
-        root_comp = design.rootComponent if design else None
-        units_mgr = design.unitsManager if design else None
-
-        context = {
-            "app": _app,
-            "ui": _ui,
-            "design": design,
-            "root_comp": root_comp,
-            "units_mgr": units_mgr,
-            "log": _log,
-            "find_body": _find_body,
-            "convert_mm": _convert_mm,
-        }
-        response.update(_handle_run_python(request, context))
+        response.update(handler(request))
         return response
     except Exception:
         response.update({"ok": False, "error": _format_exception()})
         return response
 
 
+def _handle_help(request):
+    return {"ok": True, "commands": [name for name in _COMMANDS if name != "help"]}
+
+
 def _safe_json_value(value):
     try:
         json.dumps(value)
@@ -210,7 +351,7 @@ def _safe_json_value(value):
         return repr(value)
 
 
-def _handle_run_python(request, context):
+def _handle_run_python(request):
     code = request.get("code")
     if not code:
         return {"ok": False, "error": "Missing code"}
@@ -228,19 +369,20 @@ def _handle_run_python(request, context):
     else:
         _log(f"run_python code_len={code_len} snippet={snippet}")
 
+    context = _build_context()
     exec_globals = {"adsk": adsk, "__builtins__": __builtins__}
     exec_locals = dict(context)
     exec_locals.update(inputs)
 
     stdout_buf = io.StringIO() if capture_stdout else None
-    start = time.time()
+    start_ns = time.perf_counter_ns()
     try:
         if capture_stdout:
             with contextlib.redirect_stdout(stdout_buf), contextlib.redirect_stderr(stdout_buf):
                 exec(code, exec_globals, exec_locals)
         else:
             exec(code, exec_globals, exec_locals)
-        elapsed_ms = int((time.time() - start) * 1000)
+        elapsed_ms = round((time.perf_counter_ns() - start_ns) / 1e6, 3)
         result_value = exec_locals.get(result_var)
         response = {
             "ok": True,
@@ -252,7 +394,7 @@ def _handle_run_python(request, context):
             response["stdout"] = stdout_buf.getvalue()
         return response
     except Exception:
-        elapsed_ms = int((time.time() - start) * 1000)
+        elapsed_ms = round((time.perf_counter_ns() - start_ns) / 1e6, 3)
         response = {
             "ok": False,
             "error": _format_exception(),
@@ -264,62 +406,192 @@ def _handle_run_python(request, context):
         return response
 
 
-def _server_loop(port):
-    global _server_socket
-    _server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    _server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    _server_socket.bind(("127.0.0.1", port))
-    _server_socket.listen(5)
-    _server_socket.settimeout(0.5)
-    _log(f"FusionRPCAddIn listening on 127.0.0.1:{port}")
+def _handle_batch(request):
+    calls = request.get("calls")
+    if not isinstance(calls, list) or not calls:
+        return {"ok": False, "error": "calls must be a non-empty list"}
+    stop_on_error = bool(request.get("stop_on_error", True))
+    # Each call builds its own context: an earlier call may switch the active
+    # document, and the lookups are cheap next to a main-thread visit.
+    results = []
+    ok = True
+    for call in calls:
+        cmd = call.get("cmd") if isinstance(call, dict) else None
+        handler = _COMMANDS.get(cmd)
+        if handler is None:
+            result = {"ok": False, "error": f"Unknown command: {cmd}"}
+        elif handler is _handle_batch:
+            result = {"ok": False, "error": "batch calls cannot be nested"}
+        else:
+            try:
+                result = handler(call)
+            except Exception:
+                result = {"ok": False, "error": _format_exception()}
+        results.append(result)
+        if not result.get("ok"):
+            ok = False
+            if stop_on_error:
+                break
+    return {"ok": ok, "results": results}
+
+
+_COMMANDS = {
+    "help": _handle_help,
+    "run_python": _handle_run_python,
+    "batch": _handle_batch,
+}
+
+
+def _recv_exact(conn, size):
+    """Read exactly size bytes; returns fewer only if the peer closes first."""
+    # Grow the buffer as bytes arrive instead of allocating the declared
+    # length before any payload has been sent.
+    buf = bytearray(min(size, RECV_CHUNK_SIZE))
+    offset = 0
+    while offset < size:
+        if offset == len(buf):
+            buf.extend(bytes(min(len(buf), size - offset)))
+        with memoryview(buf) as view:
+            n = conn.recv_into(view[offset:])
+        if not n:
+            break
+        offset += n
+    del buf[offset:]
+    return bytes(buf)
+
+
+def _recv_until_eof(conn, prefix=b""):
+    # Grow one buffer in place rather than concatenating bytes per chunk.
+    buf = bytearray(max(RECV_CHUNK_SIZE, len(prefix) * 2))
+    buf[:len(prefix)] = prefix
+    offset = len(prefix)
+    while True:
+        if offset == len(buf):
+            buf.extend(bytes(len(buf)))
+        with memoryview(buf) as view:
+            n = conn.recv_into(view[offset:])
+        if not n:
+            break
+        offset += n
+    del buf[offset:]
+    return bytes(buf)
+
+
+def _is_frame_header(header):
+    """Return True unless header looks like the start of an unframed request.
+
+    Unframed requests from older clients start with "{" or JSON whitespace.
+    Every length up to MAX_FRAME_SIZE starts with a byte below those, so the
+    first byte tells the two apart.
+    """
+    return len(header) == FRAME_HEADER_SIZE and header[0] not in _UNFRAMED_START_BYTES
+
+
+def _read_frame(conn, header):
+    length = int.from_bytes(header, "big")
+    if length > MAX_FRAME_SIZE:
+        raise ValueError(f"Frame too large: {length} bytes (max {MAX_FRAME_SIZE})")
+    data = _recv_exact(conn, length)
+    if len(data) < length:
+        raise ValueError(f"Truncated frame: got {len(data)} of {length} bytes")
+    return data
 
-    while not _server_stop.is_set():
+
+def _send_response(conn, response, framed):
+    payload = _encode_json(response).encode("utf-8")
+    if framed:
+        payload = len(payload).to_bytes(FRAME_HEADER_SIZE, "big") + payload
+    conn.sendall(payload)
+
+
+def _fire_rpc_event():
+    # One custom event drains the whole request queue on the main thread, so
+    # only fire when no event is already outstanding.
+    if _event_pending.is_set():
+        return
+    _event_pending.set()
+    fired = False
+    try:
+        fired = _app.fireCustomEvent(CUSTOM_EVENT_ID)
+    except Exception:
+        _log("FusionRPCAddIn: fireCustomEvent failed:\n" + _format_exception())
+    _log("FusionRPCAddIn: fireCustomEvent returned {}".format(fired))
+    if not fired:
+        _event_pending.clear()
+
+
+def _handle_connection(conn):
+    with conn:
+        conn.settimeout(CONNECTION_TIMEOUT)
         try:
-            conn, _addr = _server_socket.accept()
-        except socket.timeout:
-            continue
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        except OSError:
+            pass
+        framed = False
+        try:
+            header = _recv_exact(conn, FRAME_HEADER_SIZE)
+            if not header:
+                return
+            framed = _is_frame_header(header)
+            data = _read_frame(conn, header) if framed else _recv_until_eof(conn, header)
+            if not data:
+                return
+            request = json.loads(data)
+            _log("FusionRPCAddIn: received request: {}".format(request))
+            done_event = threading.Event()
+            response_holder = {}
+            _request_queue.put((request, done_event, response_holder))
+            _fire_rpc_event()
+            if done_event.wait(10.0):
+                response = response_holder.get("response", {"ok": False, "error": "No response"})
+                _log("FusionRPCAddIn: response ready")
+            else:
+                _log("FusionRPCAddIn: timeout waiting for Fusion API response")
+                # Let the next request fire again in case this event was dropped.
+                _event_pending.clear()
+                response = {"ok": False, "error": "Timeout waiting for Fusion API"}
+            _send_response(conn, response, framed)
         except Exception:
-            break
-        with conn:
-            conn.settimeout(1.0)
+            err = {"ok": False, "error": _format_exception()}
             try:
-                data = b""
-                while True:
-                    chunk = conn.recv(4096)
-                    if not chunk:
-                        break
-                    data += chunk
-                if not data:
-                    continue
-                request = json.loads(data.decode("utf-8"))
-                _log("FusionRPCAddIn: received request: {}".format(request))
-                done_event = threading.Event()
-                response_holder = {}
-                _request_queue.put((request, done_event, response_holder))
-                fired = False
-                try:
-                    fired = _app.fireCustomEvent(CUSTOM_EVENT_ID)
-                except Exception:
-                    _log("FusionRPCAddIn: fireCustomEvent failed:\n" + _format_exception())
-                _log("FusionRPCAddIn: fireCustomEvent returned {}".format(fired))
-                if done_event.wait(10.0):
-                    response = response_holder.get("response", {"ok": False, "error": "No response"})
-                    _log("FusionRPCAddIn: response ready")
-                else:
-                    _log("FusionRPCAddIn: timeout waiting for Fusion API response")
-                    response = {"ok": False, "error": "Timeout waiting for Fusion API"}
-                conn.sendall(json.dumps(response).encode("utf-8"))
+                _send_response(conn, err, framed)
             except Exception:
-                err = {"ok": False, "error": _format_exception()}
-                try:
-                    conn.sendall(json.dumps(err).encode("utf-8"))
-                except Exception:
-                    pass
+                pass
+
+
+def _server_loop(port, pool_size):
+    global _server_socket, _server_pool
+    _server_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    _server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    _server_socket.bind(("127.0.0.1", port))
+    _server_socket.listen(64)
+    _server_socket.settimeout(0.5)
+    # Connections are handled on a small pool so one slow Fusion call does not
+    # hold up every other client behind the accept loop.
+    _server_pool = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="fusion-rpc")
+    _log(f"FusionRPCAddIn listening on 127.0.0.1:{port} (pool={pool_size})")
 
     try:
-        _server_socket.close()
-    except Exception:
-        pass
+        while not _server_stop.is_set():
+            try:
+                conn, _addr = _server_socket.accept()
+            except socket.timeout:
+                continue
+            except Exception:
+                break
+            try:
+                _server_pool.submit(_handle_connection, conn)
+            except Exception:
+                # Pool already shut down by stop().
+                conn.close()
+                break
+    finally:
+        _server_pool.shutdown(wait=False, cancel_futures=True)
+        try:
+            _server_socket.close()
+        except Exception:
+            pass
 
 
 def run(context):
@@ -335,6 +607,7 @@ def run(context):
         _write_early_log("FusionRPCAddIn: failed to inspect app custom attrs")
 
     port = int(os.environ.get("FUSION_RPC_PORT", DEFAULT_PORT))
+    pool_size = max(1, int(os.environ.get("FUSION_RPC_POOL", DEFAULT_POOL_SIZE)))
     global _log_dir
     try:
         user_root = _app.userDataFolder
@@ -349,6 +622,7 @@ def run(context):
         _write_early_log("FusionRPCAddIn: failed to create log dir")
         pass
     _log_path = os.path.join(_log_dir, "fusion_rpc_addin.log")
+    _open_log()
     _log("FusionRPCAddIn run() starting")
     _log(f"Log path: {_log_path}")
 
@@ -371,7 +645,7 @@ def run(context):
 
     _server_stop.clear()
     _write_early_log("FusionRPCAddIn: starting server thread")
-    _server_thread = threading.Thread(target=_server_loop, args=(port,), daemon=True)
+    _server_thread = threading.Thread(target=_server_loop, args=(port, pool_size), daemon=True)
     _server_thread.start()
     _write_early_log("FusionRPCAddIn: server thread started")
 
@@ -391,8 +665,11 @@ def stop(context):
                 pass
         if _server_thread:
             _server_thread.join(timeout=2.0)
+        if _server_pool:
+            _server_pool.shutdown(wait=False, cancel_futures=True)
         if _app:
             _unregister_custom_event(_app, CUSTOM_EVENT_ID)
+        _close_log()
     except Exception:
         if _ui:
             _ui.messageBox("FusionRPCAddIn stop failed:\n{}".format(_format_exception()))
@@ -4,20 +4,49 @@ import json
 import socket
 import sys
 
+RECV_CHUNK_SIZE = 65536
+FRAME_HEADER_SIZE = 4
+
+
+def _recv_exact(sock, size):
+    chunks = []
+    remaining = size
+    while remaining:
+        chunk = sock.recv(min(remaining, RECV_CHUNK_SIZE))
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def _recv_until_eof(sock):
+    chunks = []
+    while True:
+        chunk = sock.recv(RECV_CHUNK_SIZE)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b"".join(chunks)
+
 
 def _send_request(host, port, payload, timeout):
     data = json.dumps(payload).encode("utf-8")
     with socket.create_connection((host, port), timeout=timeout) as sock:
         sock.settimeout(timeout)
-        sock.sendall(data)
+        sock.sendall(len(data).to_bytes(FRAME_HEADER_SIZE, "big") + data)
         sock.shutdown(socket.SHUT_WR)
-        chunks = []
-        while True:
-            chunk = sock.recv(4096)
-            if not chunk:
-                break
-            chunks.append(chunk)
-    raw = b"".join(chunks).decode("utf-8")
+        header = _recv_exact(sock, FRAME_HEADER_SIZE)
+        if header[:1] == b"{":
+            # Unframed reply from an older add-in.
+            raw = header + _recv_until_eof(sock)
+        elif len(header) < FRAME_HEADER_SIZE:
+            raw = b""
+        else:
+            length = int.from_bytes(header, "big")
+            raw = _recv_exact(sock, length)
+            if len(raw) < length:
+                return {"ok": False, "error": f"Truncated response: got {len(raw)} of {length} bytes"}
     return json.loads(raw) if raw else {"ok": False, "error": "Empty response"}
 
 
@@ -21,7 +21,10 @@ else:
         result = {"ok": False, "error": f"Body not found: {body_name}"}
     else:
         bbox = body.boundingBox
-        dx = (bbox.maxPoint.x - bbox.minPoint.x) * 10.0
-        dy = (bbox.maxPoint.y - bbox.minPoint.y) * 10.0
-        dz = (bbox.maxPoint.z - bbox.minPoint.z) * 10.0
+        # Fetch each corner once; every .minPoint/.maxPoint read is a Fusion API call.
+        min_pt = bbox.minPoint
+        max_pt = bbox.maxPoint
+        dx = (max_pt.x - min_pt.x) * 10.0
+        dy = (max_pt.y - min_pt.y) * 10.0
+        dz = (max_pt.z - min_pt.z) * 10.0
         result = {"ok": True, "bbox_mm": {"x": dx, "y": dy, "z": dz}}